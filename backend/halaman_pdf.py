@@ -0,0 +1,48 @@
+import os
+import threading
+from functools import lru_cache
+
+# === CONFIGURATION === #
+# Extracted page texts kept in memory; a typical CALK range is ~60 pages, a full report ~500
+PAGE_CACHE_SIZE = 4096
+
+# PdfReader is not safe to share between threads while extracting
+_LOCK = threading.Lock()
+
+# === FUNCTIONS === #
+# Entries are keyed by path, mtime and size, so a replaced PDF is read again instead of served stale.
+def pdf_signature(pdf_file):
+    """Identify the current contents of a PDF file."""
+    stat = os.stat(pdf_file)
+    return os.path.abspath(pdf_file), stat.st_mtime_ns, stat.st_size
+
+@lru_cache(maxsize=8)
+def _reader(path, mtime_ns, size):
+    from PyPDF2 import PdfReader
+
+    return PdfReader(path)
+
+@lru_cache(maxsize=PAGE_CACHE_SIZE)
+def _page_text(path, mtime_ns, size, page_num):
+    with _LOCK:
+        return _reader(path, mtime_ns, size).pages[page_num - 1].extract_text()
+
+def extract_page_text(pdf_file, page_num, cache=True):
+    """Return the text of a (1-based) page, extracting it only the first time it is asked for.
+
+    With cache=False (low-memory mode) the text is extracted without being kept.
+    """
+    if cache:
+        return _page_text(*pdf_signature(pdf_file), page_num)
+    with _LOCK:
+        return _reader(*pdf_signature(pdf_file)).pages[page_num - 1].extract_text()
+
+def clear_cache():
+    """Drop cached readers and page texts."""
+    _page_text.cache_clear()
+    _reader.cache_clear()
+
+def page_count(pdf_file):
+    """Number of pages in a PDF."""
+    with _LOCK:
+        return len(_reader(*pdf_signature(pdf_file)).pages)
@@ -0,0 +1,81 @@
+import os
+import json
+import hashlib
+
+# === CONFIGURATION === #
+CHECKPOINT_DIR = os.getenv('CHECKPOINT_DIR', '.checkpoint')
+
+# === FUNCTIONS === #
+# A journal is an append-only JSON-lines file per (PDF, page range). The first line fingerprints the
+# PDF; each later line records either one extracted page or how many sections are committed to the
+# database. Appending keeps a checkpoint cheap even on a 1000-page scan; a torn last line from a
+# crash is cut off when the journal is reopened, so the resumed run appends after the last good record.
+def journal_path(pdf_file, start_page, end_page):
+    """Return the journal file for one PDF and page range."""
+    key = f"{os.path.abspath(pdf_file)}:{start_page}:{end_page}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(pdf_file))[0]
+    return os.path.join(CHECKPOINT_DIR, f"{name}-{digest}.jsonl")
+
+def pdf_fingerprint(pdf_file):
+    """Size and modification time of the PDF; a changed file invalidates its journal."""
+    stat = os.stat(pdf_file)
+    return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+def open_journal(pdf_file, start_page, end_page):
+    """Load the journal for this run, or start a new one if there is none or the PDF has changed."""
+    path = journal_path(pdf_file, start_page, end_page)
+    fingerprint = pdf_fingerprint(pdf_file)
+    journal = {'path': path, 'pages': {}, 'sections_committed': 0}
+
+    if os.path.exists(path):
+        records = []
+        valid_size = 0
+        with open(path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # incomplete write from an interrupted run
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                valid_size += len(line)
+        if records and records[0].get('fingerprint') == fingerprint:
+            if valid_size < os.path.getsize(path):
+                # Drop the torn tail, otherwise records appended from now on would follow it and be lost next time
+                os.truncate(path, valid_size)
+            for record in records[1:]:
+                if 'page' in record:
+                    journal['pages'][record['page']] = record['text']
+                elif 'sections_committed' in record:
+                    journal['sections_committed'] = record['sections_committed']
+            print(f"Resuming from checkpoint: {len(journal['pages'])} pages extracted, "
+                  f"{journal['sections_committed']} sections committed.")
+            return journal
+
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(json.dumps({'fingerprint': fingerprint}) + "\n")
+    return journal
+
+def append_record(journal, record):
+    """Durably append one record to the journal."""
+    with open(journal['path'], 'a', encoding='utf-8') as file:
+        file.write(json.dumps(record) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+
+def record_page(journal, page_num, text):
+    """Checkpoint the extracted text of one (1-based) page."""
+    journal['pages'][page_num] = text
+    append_record(journal, {'page': page_num, 'text': text})
+
+def record_sections(journal, count):
+    """Checkpoint how many sections have been committed to the database."""
+    journal['sections_committed'] = count
+    append_record(journal, {'sections_committed': count})
+
+def close_journal(journal):
+    """Remove the journal once the run has fully completed."""
+    if os.path.exists(journal['path']):
+        os.remove(journal['path'])
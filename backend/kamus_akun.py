@@ -0,0 +1,64 @@
+import pandas as pd
+from sqlalchemy import text
+
+# === CONFIGURATION === #
+# kamus_akun and kamus_akun_alias are created by DICTIONARY_MIGRATIONS in migrasi.py
+DICTIONARY_TABLE = 'kamus_akun'
+ALIAS_TABLE = 'kamus_akun_alias'
+
+# Interned IDs for this process: (kode_sheet, item) -> item_id. Row numbers are not part of the key:
+# they move between taxonomy versions, while a line item keeps its label.
+_ITEM_IDS = {}
+
+# === FUNCTIONS === #
+def load_aliases(engine):
+    """Return learned PDF labels as {cleaned label: (kode_sheet, item)}."""
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"""
+            SELECT a.alias, k.kode_sheet, k.item
+            FROM {ALIAS_TABLE} a JOIN {DICTIONARY_TABLE} k ON k.item_id = a.item_id
+        """))
+        return {alias: (kode_sheet, item) for alias, kode_sheet, item in rows}
+
+def load_item_aliases(host, user, db_name):
+    """Load learned aliases for a parse run; an unreachable or empty database just means no aliases yet."""
+    from migrasi import get_engine
+
+    try:
+        return load_aliases(get_engine(host, user, db_name))
+    except Exception as e:
+        print(f"No item aliases loaded, falling back to fuzzy matching: {e}")
+        return {}
+
+def resolve_item_ids(engine, df):
+    """Add an item_id column, registering any (kode_sheet, item) not yet in the dictionary."""
+    keys = df[['kode_sheet', 'item']].drop_duplicates()
+    missing = [key for key in keys.itertuples(index=False, name=None) if key not in _ITEM_IDS]
+
+    if missing:
+        with engine.begin() as conn:
+            conn.execute(
+                text(f"INSERT IGNORE INTO {DICTIONARY_TABLE} (kode_sheet, item) VALUES (:kode_sheet, :item)"),
+                [{'kode_sheet': kode_sheet, 'item': item} for kode_sheet, item in missing],
+            )
+            rows = conn.execute(text(f"SELECT item_id, kode_sheet, item FROM {DICTIONARY_TABLE}"))
+            for item_id, kode_sheet, item in rows:
+                _ITEM_IDS[(kode_sheet, item)] = item_id
+
+    ids = pd.DataFrame(
+        [(kode_sheet, item, item_id) for (kode_sheet, item), item_id in _ITEM_IDS.items()],
+        columns=['kode_sheet', 'item', 'item_id'],
+    )
+    return df.merge(ids, on=['kode_sheet', 'item'], how='left')
+
+def save_aliases(engine, df):
+    """Remember which cleaned PDF label matched which item, so the next run resolves it exactly."""
+    learned = df.loc[df['alias_pdf'].notna(), ['alias_pdf', 'item_id']].drop_duplicates('alias_pdf')
+    if learned.empty:
+        return 0
+    with engine.begin() as conn:
+        conn.execute(
+            text(f"INSERT IGNORE INTO {ALIAS_TABLE} (alias, item_id) VALUES (:alias, :item_id)"),
+            [{'alias': alias, 'item_id': int(item_id)} for alias, item_id in learned.itertuples(index=False, name=None)],
+        )
+    return len(learned)
@@ -1,8 +1,11 @@
 import os
 import re
+import hashlib
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader
-import mysql.connector
+from halaman_pdf import extract_page_text
+from jurnal import open_journal, record_page, record_sections, close_journal
+from memori import low_memory_mode, stage, report
+from periode import parse_statement_filename, period_order
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +16,15 @@ DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_NAME = os.getenv('DB_NAME')
 TABLE_NAME = os.getenv('TABLE_NAME_CaLK')
+CALK_START_PAGE = int(os.getenv('CALK_START_PAGE', 395))
+CALK_END_PAGE = int(os.getenv('CALK_END_PAGE', 454))
+CALK_CHECKPOINT = os.getenv('CALK_CHECKPOINT', '0') == '1'
+
+# With checkpointing, period rows are committed (and journaled) in batches of this size
+SECTION_BATCH = 50
+
+# Rough size of one extracted report page, used to estimate memory before extracting
+PAGE_TEXT_ESTIMATE = 8 * 1024
 
 # === EXTRACT TEXT AND ORGANIZE === #
 def clean_title(title):
@@ -33,12 +45,37 @@ def clean_title(title):
     
     return None  
 
-def extract_and_organize_text(file_path, start_page, end_page):
+def iter_page_texts(file_path, start_page, end_page, journal=None, cache=True):
+    """Yield the text of each page in range, taking checkpointed pages from the journal."""
+    for page_num in range(start_page, end_page + 1):
+        # Pages checkpointed by an earlier run are not extracted again
+        if journal is not None and page_num in journal['pages']:
+            yield journal['pages'][page_num]
+            continue
+        page_text = extract_page_text(file_path, page_num, cache=cache)
+        if journal is not None:
+            record_page(journal, page_num, page_text)
+        yield page_text
+
+def stream_lines(page_texts):
+    """Yield the same lines as "".join(page_texts).split("\\n") without building the joined text."""
+    pending = ""
+    for page_text in page_texts:
+        parts = (pending + page_text).split("\n")
+        pending = parts.pop()
+        yield from parts
+    yield pending
+
+def extract_and_organize_text(file_path, start_page, end_page, journal=None):
     try:
-        reader = PdfReader(file_path)
-        text = ""
-        for i in range(start_page - 1, end_page):  # Adjust for zero-index
-            text += reader.pages[i].extract_text()
+        # The joined text, its lines and the sections hold roughly three copies of the extracted text;
+        # over the memory budget, lines are streamed page by page and pages are not kept in the cache
+        low_memory = low_memory_mode((end_page - start_page + 1) * PAGE_TEXT_ESTIMATE * 3)
+        page_texts = iter_page_texts(file_path, start_page, end_page, journal, cache=not low_memory)
+        if low_memory:
+            lines = stream_lines(page_texts)
+        else:
+            lines = "".join(page_texts).split("\n")
 
         # Organize text into title, subtitle, and content
         organized_data = []
@@ -46,7 +83,6 @@ def extract_and_organize_text(file_path, start_page, end_page):
         current_subtitle = None
         current_content = []
 
-        lines = text.split("\n")
         for line in lines:
             if re.match(r"^\d+\.\s", line):  # Matches "1. UMUM"
                 if current_title:
@@ -89,8 +125,69 @@ def extract_and_organize_text(file_path, start_page, end_page):
         print(f"Error extracting and organizing text: {e}")
         return None
 
+# === CONTENT-ADDRESSED STORAGE === #
+def normalize_content(content):
+    """Collapse whitespace inside each line and drop blank lines, so layout noise does not change the hash."""
+    lines = (" ".join(line.split()) for line in content.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def content_hash(content):
+    """SHA-256 of the normalized section body."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def section_keys(rows):
+    """Key sections by (title, subtitle, occurrence) so repeated headings stay distinct."""
+    seen = {}
+    keyed = {}
+    for title, subtitle, hash_isi in rows:
+        n = seen.get((title, subtitle), 0)
+        seen[(title, subtitle)] = n + 1
+        keyed[(title, subtitle, n)] = hash_isi
+    return keyed
+
+def compare_sections(previous, current):
+    """Classify sections as new, changed, unchanged or removed relative to the previous period."""
+    report = {'baru': [], 'berubah': [], 'tetap': [], 'dihapus': []}
+    for key, hash_isi in current.items():
+        if key not in previous:
+            report['baru'].append(key)
+        elif previous[key] != hash_isi:
+            report['berubah'].append(key)
+        else:
+            report['tetap'].append(key)
+    report['dihapus'] = [key for key in previous if key not in current]
+    return report
+
+def print_change_report(report, previous_period):
+    """Print which sections changed since the previous period."""
+    if previous_period is None:
+        print("No previous period stored; all sections are new.")
+        return
+    print(f"Changes since {previous_period[1]}-{previous_period[0]}: "
+          f"{len(report['baru'])} new, {len(report['berubah'])} changed, "
+          f"{len(report['tetap'])} unchanged, {len(report['dihapus'])} removed.")
+    for status in ('baru', 'berubah', 'dihapus'):
+        for title, subtitle, _ in report[status]:
+            print(f"  [{status}] {title} / {subtitle or '-'}")
+
 # === SAVE TO DATABASE === #
-def save_to_database(host, user, password, db_name, table_name, data):
+def save_to_database(host, user, password, db_name, table_name, data, kode_emiten, tahun, quartal, journal=None):
+    """Store unique section bodies once in {table}_isi and point this period's rows in {table}_periode at them.
+
+    With a journal, period rows are committed in batches and a restarted run continues after the
+    last committed batch. Returns True once everything is saved.
+    """
+    # Rows are replaced per period, so an unknown period would overwrite another file's sections
+    if not kode_emiten or not tahun:
+        print("Refusing to save: the period of this PDF is unknown "
+              "(expected a FinancialStatement-<tahun>-<periode>-<kode>.pdf file name).")
+        return False
+
+    import mysql.connector
+
+    content_table = f"{table_name}_isi"
+    period_table = f"{table_name}_periode"
+    connection = None
     try:
         connection = mysql.connector.connect(
             host=host,
@@ -100,38 +197,118 @@ def save_to_database(host, user, password, db_name, table_name, data):
         )
         cursor = connection.cursor()
 
-        # Create table if it doesn't exist
-        create_table_query = f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            title VARCHAR(255) NOT NULL,
-            subtitle VARCHAR(255),
+        # Create tables if they don't exist
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {content_table} (
+            hash_isi CHAR(64) PRIMARY KEY,
             content LONGTEXT NOT NULL
         );
-        """
-        cursor.execute(create_table_query)
+        """)
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {period_table} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            kode_emiten VARCHAR(16) NOT NULL,
+            tahun SMALLINT NOT NULL,
+            quartal VARCHAR(10) NOT NULL,
+            urutan INT NOT NULL,
+            title VARCHAR(255),
+            subtitle LONGTEXT,
+            hash_isi CHAR(64) NOT NULL,
+            INDEX idx_{period_table}_periode (kode_emiten, tahun, quartal),
+            INDEX idx_{period_table}_hash (hash_isi)
+        );
+        """)
 
-        # Insert data into table
-        insert_query = f"INSERT INTO {table_name} (title, subtitle, content) VALUES (%s, %s, %s)"
-        for entry in data:
-            cursor.execute(insert_query, (entry['title'], entry['subtitle'], entry['content']))
-        connection.commit()
+        # Hash every section body; identical bodies within the document collapse to one entry
+        bodies = {}
+        rows = []
+        for urutan, entry in enumerate(data):
+            content = normalize_content(entry['content'])
+            hash_isi = content_hash(content)
+            bodies[hash_isi] = content
+            rows.append((kode_emiten, tahun, quartal, urutan, entry['title'], entry['subtitle'], hash_isi))
 
-        print("Data has been saved to the database.")
+        # Only send bodies the database has not stored yet
+        hashes = list(bodies)
+        existing = set()
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"SELECT hash_isi FROM {content_table} WHERE hash_isi IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+        new_bodies = [(hash_isi, bodies[hash_isi]) for hash_isi in hashes if hash_isi not in existing]
+        cursor.executemany(f"INSERT IGNORE INTO {content_table} (hash_isi, content) VALUES (%s, %s)", new_bodies)
+
+        # Find the most recent stored period before this one for the change report
+        cursor.execute(f"SELECT DISTINCT tahun, quartal FROM {period_table} WHERE kode_emiten = %s", (kode_emiten,))
+        current_order = period_order(tahun, quartal)
+        earlier = [p for p in cursor.fetchall() if period_order(*p) < current_order]
+        previous_period = max(earlier, key=lambda p: period_order(*p), default=None)
+        previous = {}
+        if previous_period is not None:
+            cursor.execute(
+                f"SELECT title, subtitle, hash_isi FROM {period_table} "
+                f"WHERE kode_emiten = %s AND tahun = %s AND quartal = %s ORDER BY urutan",
+                (kode_emiten, *previous_period),
+            )
+            previous = section_keys(cursor.fetchall())
+
+        # Replace this period's rows so a re-run does not duplicate them, unless resuming a partial save
+        committed = journal['sections_committed'] if journal is not None else 0
+        if committed == 0:
+            cursor.execute(
+                f"DELETE FROM {period_table} WHERE kode_emiten = %s AND tahun = %s AND quartal = %s",
+                (kode_emiten, tahun, quartal),
+            )
+        # Without a journal the DELETE and the INSERT below commit together, so a failed insert keeps the old rows;
+        # with one, batches are committed (and journaled) as they go, so the DELETE must be committed first
+        if journal is not None:
+            connection.commit()
+
+        batch_size = SECTION_BATCH if journal is not None else max(len(rows), 1)
+        for i in range(committed, len(rows), batch_size):
+            cursor.executemany(
+                f"INSERT INTO {period_table} (kode_emiten, tahun, quartal, urutan, title, subtitle, hash_isi) "
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows[i:i + batch_size],
+            )
+            connection.commit()
+            if journal is not None:
+                record_sections(journal, min(i + batch_size, len(rows)))
+
+        print(f"Data has been saved to the database: {len(rows)} sections, "
+              f"{len(new_bodies)} new bodies, {len(hashes) - len(new_bodies)} already stored.")
+        current = section_keys((title, subtitle, hash_isi) for *_, title, subtitle, hash_isi in rows)
+        print_change_report(compare_sections(previous, current), previous_period)
+        return True
     except mysql.connector.Error as err:
         print(f"Database error: {err}")
+        return False
     finally:
-        if connection.is_connected():
+        if connection is not None and connection.is_connected():
             cursor.close()
             connection.close()
 
 # === MAIN SCRIPT === #
 if __name__ == "__main__":
+    tahun, quartal, kode_emiten = parse_statement_filename(PDF_FILE or '')
     if not os.path.exists(PDF_FILE):
         print("PDF file not found. Please check the path in the .env file.")
+    elif tahun is None:
+        print("PDF file name does not identify a period; rename it to FinancialStatement-<tahun>-<periode>-<kode>.pdf.")
+        exit(1)
     else:
+        # With CALK_CHECKPOINT=1, extracted pages and committed sections are journaled for resuming
+        journal = open_journal(PDF_FILE, CALK_START_PAGE, CALK_END_PAGE) if CALK_CHECKPOINT else None
+
         # Extract and organize text
-        organized_text = extract_and_organize_text(PDF_FILE, 395, 454)
+        with stage("calk: extract and organize"):
+            organized_text = extract_and_organize_text(PDF_FILE, CALK_START_PAGE, CALK_END_PAGE, journal)
         if organized_text:
             # Save organized text to the database
-            save_to_database(DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, TABLE_NAME, organized_text)
+            with stage("calk: save to database"):
+                saved = save_to_database(DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, TABLE_NAME, organized_text,
+                                         kode_emiten, tahun, quartal, journal)
+            if saved and journal is not None:
+                close_journal(journal)
+        report()
@@ -1,11 +1,14 @@
 import os
 from dotenv import load_dotenv
 import pandas as pd
-from sqlalchemy import create_engine, text
-from PyPDF2 import PdfReader
 import re
+from functools import lru_cache
 import difflib
 
+from halaman_pdf import extract_page_text
+from memori import stage, report
+from periode import parse_statement_filename
+
 # === Load environment variables === #
 load_dotenv()
 
@@ -16,12 +19,17 @@ DB_HOST = os.getenv('DB_HOST')
 DB_USER = os.getenv('DB_USER')
 DB_NAME = 'pangkalan_data'
 TABLE_NAME = 'laporan_keuangan'
+NOTES_PAGES = [384, 385, 386, 387]
 
 # === FUNCTIONS === #
+@lru_cache(maxsize=32)
+def _read_excel_sheet(path, mtime_ns, sheet_name):
+    return pd.read_excel(path, sheet_name=sheet_name, header=None)
+
 def load_excel_sheet(file_path, sheet_name):
-    """Load a specific sheet from an Excel file."""
+    """Load a specific sheet from an Excel file (cached in memory until the file changes)."""
     try:
-        return pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+        return _read_excel_sheet(os.path.abspath(file_path), os.stat(file_path).st_mtime_ns, sheet_name)
     except Exception as e:
         print(f"Error reading Excel sheet {sheet_name}: {e}")
         exit(1)
@@ -29,26 +37,25 @@ def load_excel_sheet(file_path, sheet_name):
 def extract_notes_from_pdf(pdf_file, pages):
     """Extract notes and associate them with items from specified pages of the PDF."""
     try:
-        with open(pdf_file, 'rb') as file:
-            reader = PdfReader(file)
-            notes_dict = {}
-            for page_num in pages:
-                page_text = reader.pages[page_num - 1].extract_text()
-
-                # Regex to detect notes like "2e,2f,2i,4" following items
-                matches = re.findall(r"(?P<item>[\w\s]+?)\s(?P<notes>(\d+[a-z]{1,2}(?:,\d+[a-z]{1,2})(?:,\d+)))", page_text, re.IGNORECASE)
-
-                # Add to dictionary
-                for match in matches:
-                    item = match[0].strip()
-                    note = match[1].strip()
-                    notes_dict[item] = note
-
-            return notes_dict
+        notes_dict = {}
+        for page_num in pages:
+            page_text = extract_page_text(pdf_file, page_num)
+
+            # Regex to detect notes like "2e,2f,2i,4" following items
+            matches = re.findall(r"(?P<item>[\w\s]+?)\s(?P<notes>(\d+[a-z]{1,2}(?:,\d+[a-z]{1,2})(?:,\d+)))", page_text, re.IGNORECASE)
+
+            # Add to dictionary
+            for match in matches:
+                item = match[0].strip()
+                note = match[1].strip()
+                notes_dict[item] = note
+
+        return notes_dict
     except Exception as e:
         print(f"Error extracting notes from PDF: {e}")
         exit(1)
 
+@lru_cache(maxsize=4096)
 def clean_item(item):
     """Cleans item text from unwanted characters."""
     item = re.sub(r'\s+', ' ', item).strip()  # Remove excess spaces
@@ -61,8 +68,12 @@ def fuzzy_match_item(excel_item, pdf_item, threshold=0.5):
     print(f"Matching '{excel_item}' with '{pdf_item}' - Cleaned: '{clean_item(excel_item)}' vs '{clean_item(pdf_item)}' - Ratio: {ratio}")
     return ratio > threshold  # Match if ratio exceeds threshold
 
-def parse_excel_to_dataframe(excel_file, notes_dict, report_type='neraca'):
-    """Parse data from Excel into a DataFrame based on the report type."""
+def parse_excel_to_dataframe(excel_file, notes_dict, report_type='neraca', aliases=None):
+    """Parse data from Excel into a DataFrame based on the report type.
+
+    aliases maps cleaned PDF labels to the (kode_sheet, item) they matched in an earlier run
+    (see kamus_akun.py); those notes resolve by exact lookup instead of fuzzy matching.
+    """
     grup_lk_map = {
         'neraca': 'laporan_neraca',
         'laba_rugi': 'laporan_labarugi',
@@ -80,25 +91,25 @@ def parse_excel_to_dataframe(excel_file, notes_dict, report_type='neraca'):
         print(f"Error extracting entity name and code: {e}")
         exit(1)
 
-    # Mapping file names to quarter
-    kuartal_map = {
-        'FinancialStatement-2023-I-BBRI.xlsx': 'I',
-        'FinancialStatement-2023-II-BBRI.xlsx': 'II',
-        'FinancialStatement-2023-III-BBRI.xlsx': 'III',
-        'FinancialStatement-2023-Tahunan-BBRI.xlsx': 'IV',
-    }
-    quartal = kuartal_map.get(os.path.basename(excel_file), 'Unknown')
+    # Quarter and emiten code come from the file name (e.g. FinancialStatement-2023-II-BBRI.xlsx -> II, BBRI).
+    # B8 is not a reliable code: older workbooks have one row less, so it holds the entity number (AA426)
+    tahun, quartal, kode_emiten = parse_statement_filename(excel_file)
+    if kode_emiten:
+        no_emiten = kode_emiten
 
     # Load the relevant sheet based on report type
     if report_type == 'neraca':
+        kode_sheet = '4220000'
         sheet_4220000 = load_excel_sheet(excel_file, '4220000')
         item_column = sheet_4220000.iloc[3:, 0].reset_index(drop=True)
         value_column = sheet_4220000.iloc[3:, 1].reset_index(drop=True)
     elif report_type == 'laba_rugi':
+        kode_sheet = '4312000'
         sheet_4312000 = load_excel_sheet(excel_file, '4312000')
         item_column = sheet_4312000.iloc[3:, 0].reset_index(drop=True)
         value_column = sheet_4312000.iloc[3:, 1].reset_index(drop=True)
     elif report_type == 'arus_kas':
+        kode_sheet = '4510000'
         sheet_4510000 = load_excel_sheet(excel_file, '4510000')
         item_column = sheet_4510000.iloc[3:, 0].reset_index(drop=True)
         value_column = sheet_4510000.iloc[3:, 1].reset_index(drop=True)
@@ -109,17 +120,34 @@ def parse_excel_to_dataframe(excel_file, notes_dict, report_type='neraca'):
     for item, value in zip(item_column, value_column):
         if pd.notna(value) and isinstance(value, (int, float)):
             valid_data.append((item.strip(), value))  # Strip extra spaces from items
-    
+
+    # Notes whose PDF label is a known alias of an item in this sheet are looked up exactly; aliases
+    # of items this sheet does not have leave the label to fuzzy matching
+    aliases = aliases or {}
+    sheet_items = {(kode_sheet, item) for item, _ in valid_data}
+    known_notes = {}
+    fuzzy_candidates = {}
+    for pdf_item, note in notes_dict.items():
+        key = aliases.get(clean_item(pdf_item))
+        if key in sheet_items:
+            known_notes[key] = (pdf_item, note)
+        else:
+            fuzzy_candidates[pdf_item] = note
+
     # Combine data with notes
     data = []
-    for i, (item, value) in enumerate(valid_data):
+    for item, value in valid_data:
         matched_note = ""  # Start with no note
-
-        # Check for fuzzy matches in notes_dict
-        for pdf_item, note in notes_dict.items():
-            if fuzzy_match_item(item, pdf_item):  # Fuzzy matching function (you can define it)
-                matched_note = note
-                break
+        matched_pdf_item = None
+
+        if (kode_sheet, item) in known_notes:
+            matched_pdf_item, matched_note = known_notes[(kode_sheet, item)]
+        else:
+            # Check for fuzzy matches among the PDF labels no alias has claimed
+            for pdf_item, note in fuzzy_candidates.items():
+                if fuzzy_match_item(item, pdf_item):  # Fuzzy matching function (you can define it)
+                    matched_pdf_item, matched_note = pdf_item, note
+                    break
         
         # Ensure no duplicate notes
         if matched_note:
@@ -129,14 +157,21 @@ def parse_excel_to_dataframe(excel_file, notes_dict, report_type='neraca'):
         if matched_note == "":  # Print out items that failed to match any note
             print(f"Failed to match item: {item}")
         
-        # Prepare data for DataFrame
-        data.append([no_emiten, nama, quartal, grup_lk, item, value, matched_note])
+        # Prepare data for DataFrame; kode_sheet/alias_pdf feed the item dictionary in save_to_mysql
+        alias_pdf = clean_item(matched_pdf_item) if matched_pdf_item else None
+        data.append([no_emiten, nama, tahun or 0, quartal, grup_lk, item, value, matched_note, kode_sheet, alias_pdf])
 
     # Create the DataFrame with proper columns
-    return pd.DataFrame(data, columns=['kode_emiten', 'nama_emiten', 'quartal', 'grup_lk', 'item', 'nilai', 'catatan'])
+    return pd.DataFrame(data, columns=['kode_emiten', 'nama_emiten', 'tahun', 'quartal', 'grup_lk', 'item', 'nilai', 'catatan',
+                                       'kode_sheet', 'alias_pdf'])
+
+def save_to_mysql(df, table_name, host, user, db_name, replace=False):
+    """Save a DataFrame to a MySQL database; with replace=True, rows already stored for its periods are deleted first."""
+    from sqlalchemy import create_engine, text
+    from migrasi import migrate, delete_period
+    from muat_massal import bulk_load
+    from kamus_akun import resolve_item_ids, save_aliases
 
-def save_to_mysql(df, table_name, host, user, db_name):
-    """Save a DataFrame to a MySQL database."""
     mysql_uri = f'mysql+mysqlconnector://{user}@{host}/'
     engine = create_engine(mysql_uri)
     try:
@@ -144,52 +179,65 @@ def save_to_mysql(df, table_name, host, user, db_name):
             conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {db_name}"))
         
         mysql_uri += db_name
-        engine = create_engine(mysql_uri)
+        engine = create_engine(mysql_uri, connect_args={'allow_local_infile': True})
 
-        # Create table if it does not exist
-        with engine.connect() as conn:
-            conn.execute(text(f"""
-                CREATE TABLE IF NOT EXISTS {table_name} (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    kode_emiten VARCHAR(255),
-                    nama_emiten VARCHAR(255),
-                    quartal VARCHAR(10),
-                    grup_lk VARCHAR(50),
-                    item VARCHAR(255),
-                    nilai BIGINT,
-                    catatan TEXT
-                );
-            """))
-
-        # Insert data into the table
-        df.to_sql(table_name, engine, if_exists='append', index=False)
+        # Create or upgrade the table schema (see migrasi.py)
+        migrate(engine, table_name)
+
+        # Re-loading a period replaces it instead of appending a second copy
+        if replace:
+            for kode_emiten, tahun, quartal in df[['kode_emiten', 'tahun', 'quartal']].drop_duplicates().itertuples(index=False, name=None):
+                deleted = delete_period(engine, table_name, kode_emiten, int(tahun), quartal)
+                print(f"Deleted {deleted} stored rows of {kode_emiten} {tahun}-{quartal} before re-loading.")
+
+        # Store facts against interned kamus_akun IDs instead of repeating the label on every row
+        df = resolve_item_ids(engine, df)
+        save_aliases(engine, df)
+        df = df.drop(columns=['item', 'kode_sheet', 'alias_pdf'])
+
+        # Insert data into the table (LOAD DATA LOCAL INFILE, or chunked inserts as a fallback)
+        bulk_load(df, engine, table_name)
         print(f"Data successfully added to table '{table_name}' in database '{db_name}'.")
     except Exception as e:
         print(f"Error saving data to MySQL: {e}")
         exit(1)
 
-# === MAIN SCRIPT === #
-if __name__ == "__main__":
-    # Extract notes from the PDF (modify page numbers as needed)
-    notes_dict = extract_notes_from_pdf(PDF_FILE, pages=[384, 385, 386, 387])
+def build_statement_dataframe(excel_file, pdf_file, pages=NOTES_PAGES, aliases=None):
+    """Parse neraca, laba rugi and arus kas from one workbook into a single DataFrame."""
+    # Extract notes from the PDF (modify page numbers as needed); without a PDF, items get no notes
+    with stage("keuangan: extract notes"):
+        notes_dict = extract_notes_from_pdf(pdf_file, pages=pages) if pdf_file else {}
     print("Extracted Notes Dictionary:", notes_dict)
 
     # Parse Neraca data from Excel
-    df_neraca = parse_excel_to_dataframe(EXCEL_FILE, notes_dict, report_type='neraca')
+    with stage("keuangan: parse neraca"):
+        df_neraca = parse_excel_to_dataframe(excel_file, notes_dict, report_type='neraca', aliases=aliases)
     print("\nParsed Neraca DataFrame:")
     print(df_neraca.head())
 
     # Parse Laporan Laba Rugi data from Excel
-    df_laba_rugi = parse_excel_to_dataframe(EXCEL_FILE, notes_dict, report_type='laba_rugi')
+    with stage("keuangan: parse laba rugi"):
+        df_laba_rugi = parse_excel_to_dataframe(excel_file, notes_dict, report_type='laba_rugi', aliases=aliases)
     print("\nParsed Laba Rugi DataFrame:")
     print(df_laba_rugi.head())
 
     # Parse Laporan Arus Kas data from Excel
-    df_arus_kas = parse_excel_to_dataframe(EXCEL_FILE, notes_dict, report_type='arus_kas')
+    with stage("keuangan: parse arus kas"):
+        df_arus_kas = parse_excel_to_dataframe(excel_file, notes_dict, report_type='arus_kas', aliases=aliases)
     print("\nParsed Arus Kas DataFrame:")
     print(df_arus_kas.head())
 
-    df_combined = pd.concat([df_neraca, df_laba_rugi, df_arus_kas], ignore_index=True)
+    with stage("keuangan: concat"):
+        return pd.concat([df_neraca, df_laba_rugi, df_arus_kas], ignore_index=True)
+
+# === MAIN SCRIPT === #
+if __name__ == "__main__":
+    from kamus_akun import load_item_aliases
+
+    aliases = load_item_aliases(DB_HOST, DB_USER, DB_NAME)
+    df_combined = build_statement_dataframe(EXCEL_FILE, PDF_FILE, aliases=aliases)
 
     # Save to MySQL
-    save_to_mysql(df_combined, TABLE_NAME, DB_HOST, DB_USER, DB_NAME)
+    with stage("keuangan: save to MySQL"):
+        save_to_mysql(df_combined, TABLE_NAME, DB_HOST, DB_USER, DB_NAME)
+    report()
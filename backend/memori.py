@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# === CONFIGURATION === #
+# MEMORY_TELEMETRY=1 records per-stage allocations with tracemalloc (which slows Python down noticeably)
+MEMORY_TELEMETRY = os.getenv('MEMORY_TELEMETRY', '0') == '1'
+# Above this resident size the pipeline switches to chunked/streaming processing; 0 disables the budget
+MEMORY_BUDGET_MB = float(os.getenv('MEMORY_BUDGET_MB', 0))
+RSS_SAMPLE_INTERVAL = 0.05
+
+MB = 1024 * 1024
+
+_stack = []       # open stages, innermost last
+_stages = []      # finished stages, in the order they were entered
+_sampler = None
+_low_memory = False
+
+# tracemalloc's peak is process-wide, so stages from different threads (pengawas workers) would reset
+# and report each other's peaks and interleave on _stack. Held by the thread with open stages: with
+# telemetry on, stages in other threads wait for it, which keeps every measurement attributable.
+_lock = threading.RLock()
+
+# === RSS === #
+def current_rss():
+    """Resident set size of this process in bytes, or None where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _sample_rss(stop):
+    """Track the highest RSS seen by every open stage until stopped."""
+    while not stop.wait(RSS_SAMPLE_INTERVAL):
+        rss = current_rss()
+        if rss is None:
+            return
+        for entry in list(_stack):
+            entry['rss_peak'] = max(entry['rss_peak'], rss)
+
+# === STAGES === #
+@contextmanager
+def stage(name):
+    """Measure one pipeline stage: wall time, tracemalloc peak/net allocation and peak RSS.
+
+    Stages may be nested; an inner stage's peak also counts towards the enclosing one.
+    Does nothing unless MEMORY_TELEMETRY is enabled; then stages in other threads run one at a time.
+    """
+    if not MEMORY_TELEMETRY:
+        yield
+        return
+
+    with _lock:
+        with _measure(name):
+            yield
+
+@contextmanager
+def _measure(name):
+    global _sampler
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    current, peak = tracemalloc.get_traced_memory()
+    if _stack:
+        _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+    tracemalloc.reset_peak()
+
+    rss = current_rss() or 0
+    entry = {
+        'name': name,
+        'depth': len(_stack),
+        'start': current,
+        'peak': current,
+        'rss_start': rss,
+        'rss_peak': rss,
+        'started_at': time.perf_counter(),
+    }
+    _stages.append(entry)
+    _stack.append(entry)
+    if _sampler is None:
+        stop = threading.Event()
+        _sampler = (stop, threading.Thread(target=_sample_rss, args=(stop,), daemon=True))
+        _sampler[1].start()
+
+    try:
+        yield
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        rss = current_rss() or 0
+        entry['peak'] = max(entry['peak'], peak)
+        entry['end'] = current
+        entry['rss_end'] = rss
+        entry['rss_peak'] = max(entry['rss_peak'], rss)
+        entry['seconds'] = time.perf_counter() - entry['started_at']
+        _stack.pop()
+        if _stack:
+            _stack[-1]['peak'] = max(_stack[-1]['peak'], entry['peak'])
+            _stack[-1]['rss_peak'] = max(_stack[-1]['rss_peak'], entry['rss_peak'])
+        elif _sampler is not None:
+            _sampler[0].set()
+            _sampler = None
+
+def report(file=sys.stdout):
+    """Print and clear the finished stages."""
+    with _lock:
+        finished = [entry for entry in _stages if 'end' in entry]
+        _stages[:] = [entry for entry in _stages if 'end' not in entry]
+    if not finished:
+        return
+    print(f"\n{'Stage':<40} {'Time s':>8} {'Alloc peak MB':>14} {'Alloc net MB':>13} {'RSS peak MB':>12} {'RSS +MB':>8}", file=file)
+    for entry in finished:
+        name = ("  " * entry['depth'] + entry['name'])[:40]
+        print(f"{name:<40} {entry['seconds']:>8.2f} "
+              f"{(entry['peak'] - entry['start']) / MB:>14.1f} "
+              f"{(entry['end'] - entry['start']) / MB:>13.1f} "
+              f"{entry['rss_peak'] / MB:>12.1f} "
+              f"{(entry['rss_end'] - entry['rss_start']) / MB:>8.1f}", file=file)
+
+# === BUDGET === #
+def low_memory_mode(extra_bytes=0):
+    """True once the memory budget is, or would be with extra_bytes more, exceeded; stays on for the process."""
+    global _low_memory
+    if _low_memory or not MEMORY_BUDGET_MB:
+        return _low_memory
+
+    used = current_rss()
+    if used is None:
+        if not tracemalloc.is_tracing():
+            return False  # no way to measure on this platform
+        used = tracemalloc.get_traced_memory()[0]
+
+    if used + extra_bytes > MEMORY_BUDGET_MB * MB:
+        _low_memory = True
+        print(f"Memory budget of {MEMORY_BUDGET_MB:.0f} MB would be exceeded "
+              f"({used / MB:.0f} MB in use, {extra_bytes / MB:.0f} MB more needed); "
+              f"switching to low-memory streaming mode.")
+    return _low_memory
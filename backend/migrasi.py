@@ -0,0 +1,205 @@
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+# === Load environment variables === #
+load_dotenv()
+
+# === CONFIGURATION === #
+DB_HOST = os.getenv('DB_HOST')
+DB_USER = os.getenv('DB_USER')
+DB_NAME = 'pangkalan_data'
+TABLE_NAME = 'laporan_keuangan'
+MIGRATIONS_TABLE = 'schema_migrations'
+
+# Years that get their own partition in migration 004; anything older (or rows with an unknown year) lands
+# in p_lama, anything newer in p_max. The range is frozen so the migration's DDL never depends on when it
+# runs; later years are split out of p_max with `python migrasi.py add-partition <tahun>`.
+PARTITION_START_YEAR = 2020
+PARTITION_END_YEAR = 2027
+
+# Report group -> sheet it is parsed from (see parse_excel_to_dataframe), for rows stored without kode_sheet
+GRUP_LK_SHEETS = {
+    'laporan_neraca': '4220000',
+    'laporan_labarugi': '4312000',
+    'laporan_aruskas': '4510000',
+}
+KODE_SHEET_SQL = "CASE grup_lk " + " ".join(f"WHEN '{grup_lk}' THEN '{kode_sheet}'" for grup_lk, kode_sheet in GRUP_LK_SHEETS.items()) + " END"
+
+# === MIGRATIONS === #
+def partition_clause(start_year, end_year):
+    """Build the RANGE (tahun) partition list from start_year up to end_year, plus a catch-all."""
+    partitions = [f"PARTITION p_lama VALUES LESS THAN ({start_year})"]
+    for tahun in range(start_year, end_year + 1):
+        partitions.append(f"PARTITION p{tahun} VALUES LESS THAN ({tahun + 1})")
+    partitions.append("PARTITION p_max VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (tahun) (\n    " + ",\n    ".join(partitions) + "\n)"
+
+# Applied in order, once per facts table. Each entry is (versi, list of SQL statements with {table} and
+# {kode_sheet} placeholders).
+# MySQL requires the partitioning column in every unique key, hence the (id, tahun) primary key.
+MIGRATIONS = [
+    ('001_create_table', [
+        """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            kode_emiten VARCHAR(255),
+            nama_emiten VARCHAR(255),
+            quartal VARCHAR(10),
+            grup_lk VARCHAR(50),
+            item VARCHAR(255),
+            nilai BIGINT,
+            catatan TEXT
+        )
+        """,
+    ]),
+    ('002_add_tahun', [
+        "ALTER TABLE {table} ADD COLUMN tahun SMALLINT NOT NULL DEFAULT 0 AFTER nama_emiten",
+    ]),
+    ('003_add_indexes', [
+        "ALTER TABLE {table} ADD INDEX idx_{table}_periode (kode_emiten, tahun, quartal, grup_lk), "
+        "ADD INDEX idx_{table}_item (item)",
+    ]),
+    ('004_partition_by_tahun', [
+        "ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, tahun)",
+        "ALTER TABLE {table} " + partition_clause(PARTITION_START_YEAR, PARTITION_END_YEAR),
+    ]),
+    ('005_add_item_id', [
+        "ALTER TABLE {table} ADD COLUMN item_id INT NULL AFTER grup_lk, ADD INDEX idx_{table}_item_id (item_id)",
+    ]),
+    # Rows stored before 005 only carry the label: register it and fill in item_id, then drop the label so
+    # item_id is the one key for a line item
+    ('006_backfill_item_id', [
+        """
+        INSERT IGNORE INTO kamus_akun (kode_sheet, item)
+        SELECT DISTINCT {kode_sheet}, item FROM {table}
+        WHERE item_id IS NULL AND item IS NOT NULL AND {kode_sheet} IS NOT NULL
+        """,
+        """
+        UPDATE {table} f
+        JOIN kamus_akun k ON k.kode_sheet = {kode_sheet} AND k.item = CONVERT(f.item USING utf8mb4) COLLATE utf8mb4_bin
+        SET f.item_id = k.item_id
+        WHERE f.item_id IS NULL
+        """,
+        "ALTER TABLE {table} DROP INDEX idx_{table}_item, DROP COLUMN item",
+    ]),
+]
+
+# Tables shared by every facts table, versioned once under their own name in schema_migrations and
+# applied before the per-table MIGRATIONS that reference them.
+# Row numbers move between taxonomy versions, so a line item is identified by its sheet and label only.
+DICTIONARY_TABLE = 'kamus_akun'
+DICTIONARY_MIGRATIONS = [
+    ('001_create_kamus_akun', [
+        """
+        CREATE TABLE IF NOT EXISTS kamus_akun (
+            item_id INT AUTO_INCREMENT PRIMARY KEY,
+            kode_sheet VARCHAR(16) NOT NULL,
+            item VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+            UNIQUE KEY uq_kamus_akun (kode_sheet, item)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS kamus_akun_alias (
+            alias VARCHAR(255) PRIMARY KEY,
+            item_id INT NOT NULL,
+            INDEX idx_kamus_akun_alias_item (item_id)
+        )
+        """,
+    ]),
+]
+
+# === FUNCTIONS === #
+def get_engine(host, user, db_name):
+    """Create the database if needed and return an engine connected to it."""
+    mysql_uri = f'mysql+mysqlconnector://{user}@{host}/'
+    engine = create_engine(mysql_uri)
+    with engine.connect() as conn:
+        conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {db_name}"))
+    return create_engine(mysql_uri + db_name)
+
+def applied_migrations(engine, table_name):
+    """Return the set of migration versions already applied to a table."""
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+                tabel VARCHAR(64) NOT NULL,
+                versi VARCHAR(64) NOT NULL,
+                diterapkan_pada TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (tabel, versi)
+            )
+        """))
+        rows = conn.execute(
+            text(f"SELECT versi FROM {MIGRATIONS_TABLE} WHERE tabel = :tabel"),
+            {'tabel': table_name},
+        )
+        return {row[0] for row in rows}
+
+def apply_migrations(engine, tabel, migrations, table_name):
+    """Apply the pending entries of one migration list, recorded in schema_migrations under tabel."""
+    done = applied_migrations(engine, tabel)
+    for versi, statements in migrations:
+        if versi in done:
+            continue
+        # MySQL commits DDL implicitly, so each statement is its own step; the version row is written last
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement.format(table=table_name, kode_sheet=KODE_SHEET_SQL)))
+            conn.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (tabel, versi) VALUES (:tabel, :versi)"),
+                {'tabel': tabel, 'versi': versi},
+            )
+        print(f"Applied migration {versi} to '{tabel}'.")
+
+def migrate(engine, table_name):
+    """Apply every pending migration to the shared dictionary tables and then to a facts table, in order."""
+    apply_migrations(engine, DICTIONARY_TABLE, DICTIONARY_MIGRATIONS, table_name)
+    apply_migrations(engine, table_name, MIGRATIONS, table_name)
+
+def add_year_partition(engine, table_name, tahun):
+    """Split a dedicated partition for a new year out of the p_max catch-all partition."""
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            ALTER TABLE {table_name} REORGANIZE PARTITION p_max INTO (
+                PARTITION p{tahun} VALUES LESS THAN ({tahun + 1}),
+                PARTITION p_max VALUES LESS THAN MAXVALUE
+            )
+        """))
+    print(f"Added partition p{tahun} to '{table_name}'.")
+
+def delete_period(engine, table_name, kode_emiten, tahun, quartal):
+    """Delete one emiten's facts for a period; the tahun filter prunes the delete to a single partition."""
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(f"DELETE FROM {table_name} WHERE tahun = :tahun AND kode_emiten = :kode_emiten AND quartal = :quartal"),
+            {'tahun': tahun, 'kode_emiten': kode_emiten, 'quartal': quartal},
+        )
+    return result.rowcount
+
+# === MAIN SCRIPT === #
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Manage the schema of the {TABLE_NAME} table.")
+    parser.add_argument('command', nargs='?', default='migrate', choices=['migrate', 'status', 'add-partition'])
+    parser.add_argument('tahun', nargs='?', type=int, help="Year for add-partition")
+    parser.add_argument('--table', default=TABLE_NAME)
+    args = parser.parse_args()
+
+    try:
+        engine = get_engine(DB_HOST, DB_USER, DB_NAME)
+        if args.command == 'migrate':
+            migrate(engine, args.table)
+            print(f"Schema of '{args.table}' is up to date.")
+        elif args.command == 'status':
+            for tabel, migrations in ((DICTIONARY_TABLE, DICTIONARY_MIGRATIONS), (args.table, MIGRATIONS)):
+                done = applied_migrations(engine, tabel)
+                for versi, _ in migrations:
+                    print(f"[{'x' if versi in done else ' '}] {tabel}: {versi}")
+        elif args.command == 'add-partition':
+            if args.tahun is None:
+                parser.error("add-partition requires a year")
+            add_year_partition(engine, args.table, args.tahun)
+    except Exception as e:
+        print(f"Error migrating schema: {e}")
+        sys.exit(1)
@@ -0,0 +1,122 @@
+import os
+import time
+import tempfile
+import pandas as pd
+
+from memori import low_memory_mode
+
+# === CONFIGURATION === #
+# Rows per INSERT statement when LOAD DATA LOCAL INFILE is not allowed
+CHUNK_SIZE = 1000
+
+# mysql-connector only streams LOAD DATA LOCAL INFILE from a file path, so the in-memory TSV is
+# spooled to a RAM-backed directory when the OS has one
+SPOOL_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Rows serialized at a time in low-memory mode, instead of the whole frame at once
+TSV_CHUNK_ROWS = 20000
+
+# MySQL error numbers meaning LOAD DATA LOCAL INFILE is switched off, which is when inserts take over:
+# 1148 ER_NOT_ALLOWED_COMMAND, 2068 CR_LOAD_DATA_LOCAL_INFILE_REJECTED, 3948 ER_CLIENT_LOCAL_FILES_DISABLED
+LOCAL_INFILE_DISABLED = {1148, 2068, 3948}
+
+# Warnings quoted in the error when a load is rejected
+WARNINGS_SHOWN = 5
+
+# === FUNCTIONS === #
+def tsv_column(series):
+    """Render one column in MySQL's default LOAD DATA text format (tab-separated, backslash-escaped, \\N for NULL)."""
+    if pd.api.types.is_float_dtype(series) and (series.dropna() % 1 == 0).all():
+        series = series.astype('Int64')  # whole-number floats from Excel go into BIGINT columns
+    missing = series.isna()
+    text = (series.astype(str)
+            .str.replace('\\', '\\\\', regex=False)
+            .str.replace('\t', '\\t', regex=False)
+            .str.replace('\n', '\\n', regex=False)
+            .str.replace('\r', '\\r', regex=False))
+    return text.mask(missing, '\\N')
+
+def dataframe_to_tsv(df):
+    """Serialize a DataFrame into a TSV string, one column at a time."""
+    if df.empty:
+        return ""
+    columns = [tsv_column(df[column]) for column in df.columns]
+    lines = columns[0].str.cat(columns[1:], sep='\t') if len(columns) > 1 else columns[0]
+    return "\n".join(lines) + "\n"
+
+def load_data_infile(df, engine, table_name):
+    """Stream a DataFrame into a table with LOAD DATA LOCAL INFILE; returns the number of rows loaded.
+
+    LOCAL implies IGNORE: bad values become warnings and rows may be skipped. Unlike the INSERT path
+    that would lose data silently, so the load is rolled back if the server reports any warning or
+    loads a different number of rows than the frame has.
+    """
+    column_list = ", ".join(f"`{column}`" for column in df.columns)
+
+    # The TSV text is about twice the frame's in-memory size; over the budget it is built in row chunks
+    # and spooled to disk rather than RAM
+    low_memory = low_memory_mode(int(df.memory_usage(deep=True).sum()) * 2)
+    chunk_rows = TSV_CHUNK_ROWS if low_memory else max(len(df), 1)
+    spool_dir = None if low_memory else SPOOL_DIR
+
+    spool = tempfile.NamedTemporaryFile('w', suffix='.tsv', dir=spool_dir, encoding='utf-8', newline='', delete=False)
+    try:
+        with spool:
+            for start in range(0, len(df), chunk_rows):
+                spool.write(dataframe_to_tsv(df.iloc[start:start + chunk_rows]))
+        path = spool.name.replace('\\', '/')
+
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                LOAD DATA LOCAL INFILE '{path}'
+                INTO TABLE {table_name}
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+                LINES TERMINATED BY '\\n'
+                ({column_list})
+            """)
+            rows = cursor.rowcount
+            cursor.execute("SHOW WARNINGS")
+            warnings = [warning for warning in cursor.fetchall() if warning[0] != 'Note']
+            if warnings or rows != len(df):
+                connection.rollback()
+                shown = "; ".join(f"{level} {code}: {message}" for level, code, message in warnings[:WARNINGS_SHOWN])
+                raise ValueError(f"LOAD DATA loaded {rows} of {len(df)} rows into '{table_name}' "
+                                 f"with {len(warnings)} warning(s), rolled back. {shown}")
+            connection.commit()
+            cursor.close()
+        finally:
+            connection.close()
+    finally:
+        os.remove(spool.name)
+    return rows
+
+def insert_chunks(df, engine, table_name, chunksize=CHUNK_SIZE):
+    """Append a DataFrame with multi-row INSERT statements of chunksize rows each."""
+    df.to_sql(table_name, engine, if_exists='append', index=False, method='multi', chunksize=chunksize)
+    return len(df)
+
+def bulk_load(df, engine, table_name, chunksize=CHUNK_SIZE):
+    """Load a DataFrame as fast as the server allows and report throughput.
+
+    Uses LOAD DATA LOCAL INFILE and falls back to chunked multi-row inserts when the
+    server or client has local_infile disabled; any other failure is raised. The engine
+    must be created with connect_args={'allow_local_infile': True} for the fast path.
+    """
+    start = time.perf_counter()
+    try:
+        rows = load_data_infile(df, engine, table_name)
+        method = "LOAD DATA LOCAL INFILE"
+    except Exception as e:
+        if getattr(e, 'errno', None) not in LOCAL_INFILE_DISABLED:
+            raise
+        print(f"LOAD DATA LOCAL INFILE not available ({e}); falling back to multi-row inserts.")
+        rows = insert_chunks(df, engine, table_name, chunksize)
+        method = f"multi-row INSERT ({chunksize} rows/statement)"
+
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"Loaded {rows} rows into '{table_name}' via {method} in {elapsed:.2f}s ({rate:,.0f} rows/sec).")
+    return rows
@@ -1,10 +1,12 @@
 import os
 from dotenv import load_dotenv
 import pandas as pd
-from sqlalchemy import create_engine, text
-from PyPDF2 import PdfReader
 import re
 
+from halaman_pdf import extract_page_text
+# One cached sheet reader for both loaders, so a workbook parsed by either is not parsed again
+from laporan_keuangan import load_excel_sheet
+
 load_dotenv()
 
 # === CONFIGURATION === #
@@ -16,63 +18,50 @@ DB_NAME = 'pangkalan_data'
 TABLE_NAME = 'laporan_neraca'
 
 # === FUNCTIONS === #
-def load_excel_sheet(file_path, sheet_name):
-    """Load a specific sheet from an Excel file."""
-    try:
-        return pd.read_excel(file_path, sheet_name=sheet_name, header=None)
-    except Exception as e:
-        print(f"Error reading Excel sheet {sheet_name}: {e}")
-        exit(1)
-
-import re
-from PyPDF2 import PdfReader
-
 def extract_notes_from_pdf(pdf_file, pages):
     """Extract notes from specified pages of the PDF."""
     try:
-        with open(pdf_file, 'rb') as file:
-            reader = PdfReader(file)
-            notes_dict = {}
+        notes_dict = {}
+        
+        # Loop through the pages specified
+        for page_num in pages:
+            page_text = extract_page_text(pdf_file, page_num)
             
-            # Loop through the pages specified
-            for page_num in pages:
-                page_text = reader.pages[page_num - 1].extract_text()
-                
-                # Log the extracted text to debug the structure
-                print(f"Extracted Text from Page {page_num}:\n{page_text}\n")
-                
-                # Regex to capture items and their corresponding notes
-                matches = re.findall(r"([A-Za-z\s]+)\s*[:\n]?\s*([0-9a-zA-Z,]+(?:\s*,\s*[0-9a-zA-Z]+)*)", page_text, re.IGNORECASE)
-                
-                # Check if matches are found and process them
-                if matches:
-                    for item, note in matches:
-                        item = item.strip()  # Clean up the item name
-                        note = note.strip()  # Clean up the note
-
-                        # Log if the note for an item is empty
-                        if not note:
-                            print(f"Warning: No note found for item '{item}' on page {page_num}")
-                        
-                        # Add the note for the particular item
-                        if item not in notes_dict:
-                            notes_dict[item] = []
-                        notes_dict[item].append(note)
-                else:
-                    print(f"No matches found on page {page_num}")
+            # Log the extracted text to debug the structure
+            print(f"Extracted Text from Page {page_num}:\n{page_text}\n")
             
-            # Join notes into a single string without removing duplicates and ensure the correct format
-            for key in notes_dict:
-                notes_dict[key] = ",".join(notes_dict[key])
-
-            # Log the notes in a structured manner
-            print("\nExtracted Notes Dictionary:")
-            for item, notes in notes_dict.items():
-                print(f"{item}:")
-                print(f"  {notes}\n")
+            # Regex to capture items and their corresponding notes
+            matches = re.findall(r"([A-Za-z\s]+)\s*[:\n]?\s*([0-9a-zA-Z,]+(?:\s*,\s*[0-9a-zA-Z]+)*)", page_text, re.IGNORECASE)
             
-            print('peler',notes_dict)
-            return notes_dict
+            # Check if matches are found and process them
+            if matches:
+                for item, note in matches:
+                    item = item.strip()  # Clean up the item name
+                    note = note.strip()  # Clean up the note
+
+                    # Log if the note for an item is empty
+                    if not note:
+                        print(f"Warning: No note found for item '{item}' on page {page_num}")
+                    
+                    # Add the note for the particular item
+                    if item not in notes_dict:
+                        notes_dict[item] = []
+                    notes_dict[item].append(note)
+            else:
+                print(f"No matches found on page {page_num}")
+        
+        # Join notes into a single string without removing duplicates and ensure the correct format
+        for key in notes_dict:
+            notes_dict[key] = ",".join(notes_dict[key])
+
+        # Log the notes in a structured manner
+        print("\nExtracted Notes Dictionary:")
+        for item, notes in notes_dict.items():
+            print(f"{item}:")
+            print(f"  {notes}\n")
+        
+        print('peler',notes_dict)
+        return notes_dict
     except Exception as e:
         print(f"Error extracting notes from PDF: {e}")
         exit(1)
@@ -120,6 +109,8 @@ def parse_excel_to_dataframe(excel_file, notes_dict):
 
 def save_to_mysql(df, table_name, host, user, db_name):
     """Save a DataFrame to a MySQL database."""
+    from sqlalchemy import create_engine, text
+
     mysql_uri = f'mysql+mysqlconnector://{user}@{host}/'
     engine = create_engine(mysql_uri)
     try:
@@ -0,0 +1,136 @@
+import os
+import sys
+import glob
+import runpy
+import argparse
+
+# Only the standard library is imported here. pandas, SQLAlchemy, PyPDF2, mysql-connector and
+# ttkbootstrap are pulled in by the subcommand that needs them, so `--help` and argument errors
+# stay cheap. Cold-start target: `python pangkalan.py --help` under 100 ms
+# (measure with `python -X importtime pangkalan.py --help`).
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === FUNCTIONS === #
+def set_env(**overrides):
+    """Export command-line overrides before a module reads its configuration.
+
+    load_dotenv() never overrides variables that are already set, so these win over .env.
+    """
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+
+def run_script(module_name):
+    """Run one of the backend scripts as if it were started directly."""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    runpy.run_module(module_name, run_name='__main__', alter_sys=True)
+
+def cmd_neraca(args):
+    set_env(EXCEL_FILE=args.excel, PDF_FILE=args.pdf)
+    run_script('neraca')
+
+def cmd_keuangan(args):
+    set_env(EXCEL_FILE=args.excel, PDF_FILE=args.pdf)
+    run_script('laporan_keuangan')
+
+def cmd_calk(args):
+    set_env(PDF_FILE=args.pdf, CALK_START_PAGE=args.start, CALK_END_PAGE=args.end,
+            CALK_CHECKPOINT='1' if args.checkpoint else None)
+    run_script('laporan_calk')
+
+def cmd_ui(args):
+    run_script('ui-calk-code')
+
+def cmd_batch(args):
+    """Load every FinancialStatement workbook in a directory, with notes from its paired PDF."""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import laporan_keuangan
+    from kamus_akun import load_item_aliases
+    from memori import low_memory_mode, report
+
+    excel_files = sorted(glob.glob(os.path.join(args.dir, 'FinancialStatement-*.xlsx')))
+    if not excel_files:
+        print(f"No FinancialStatement workbooks found in '{args.dir}'.")
+        return
+
+    aliases = load_item_aliases(laporan_keuangan.DB_HOST, laporan_keuangan.DB_USER, laporan_keuangan.DB_NAME)
+    frames = []
+    for excel_file in excel_files:
+        pdf_file = os.path.splitext(excel_file)[0] + '.pdf'
+        if not os.path.exists(pdf_file):
+            pdf_file = None
+        print(f"\n=== {os.path.basename(excel_file)} (notes: {os.path.basename(pdf_file) if pdf_file else '-'}) ===")
+        frames.append(laporan_keuangan.build_statement_dataframe(excel_file, pdf_file, aliases=aliases))
+
+        # Over the memory budget, save what has been parsed so far instead of holding every workbook
+        if low_memory_mode(int(sum(frame.memory_usage(deep=True).sum() for frame in frames))):
+            save_frames(laporan_keuangan, frames)
+            frames = []
+
+    save_frames(laporan_keuangan, frames)
+    report()
+
+def save_frames(laporan_keuangan, frames):
+    """Concatenate parsed workbooks and append them to laporan_keuangan."""
+    import pandas as pd
+    from memori import stage
+
+    if not frames:
+        return
+    with stage(f"batch: save {len(frames)} workbook(s)"):
+        laporan_keuangan.save_to_mysql(
+            pd.concat(frames, ignore_index=True),
+            laporan_keuangan.TABLE_NAME,
+            laporan_keuangan.DB_HOST,
+            laporan_keuangan.DB_USER,
+            laporan_keuangan.DB_NAME,
+        )
+
+def cmd_watch(args):
+    set_env(WATCH_DIR=args.dir, WATCH_POLL_INTERVAL=args.interval, WATCH_WORKERS=args.workers)
+    run_script('pengawas')
+
+def build_parser():
+    """Build the argument parser for all subcommands."""
+    parser = argparse.ArgumentParser(prog='pangkalan', description="Pangkalan data ingestion tools.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    neraca = subparsers.add_parser('neraca', help="Load the balance sheet (4220000) into laporan_neraca")
+    neraca.add_argument('--excel', help="Excel file (default: EXCEL_FILE from .env)")
+    neraca.add_argument('--pdf', help="PDF file (default: PDF_FILE from .env)")
+    neraca.set_defaults(func=cmd_neraca)
+
+    keuangan = subparsers.add_parser('keuangan', help="Load neraca, laba rugi and arus kas into laporan_keuangan")
+    keuangan.add_argument('--excel', help="Excel file (default: EXCEL_FILE from .env)")
+    keuangan.add_argument('--pdf', help="PDF file (default: PDF_FILE from .env)")
+    keuangan.set_defaults(func=cmd_keuangan)
+
+    calk = subparsers.add_parser('calk', help="Extract CALK sections from the PDF into the database")
+    calk.add_argument('--pdf', help="PDF file (default: PDF_FILE from .env)")
+    calk.add_argument('--start', type=int, help="First CALK page (default: 395)")
+    calk.add_argument('--end', type=int, help="Last CALK page (default: 454)")
+    calk.add_argument('--checkpoint', action='store_true', help="Journal progress and resume an interrupted run")
+    calk.set_defaults(func=cmd_calk)
+
+    ui = subparsers.add_parser('ui', help="Open the CALK extractor window")
+    ui.set_defaults(func=cmd_ui)
+
+    batch = subparsers.add_parser('batch', help="Load every workbook in a directory into laporan_keuangan")
+    batch.add_argument('--dir', default='resource', help="Directory with FinancialStatement-*.xlsx/.pdf files")
+    batch.set_defaults(func=cmd_batch)
+
+    watch = subparsers.add_parser('watch', help="Ingest new or changed files in a directory as they arrive")
+    watch.add_argument('--dir', help="Directory to watch (default: WATCH_DIR or resource)")
+    watch.add_argument('--interval', type=float, help="Seconds between directory scans (default: 5)")
+    watch.add_argument('--workers', type=int, help="Number of ingest workers (default: 1)")
+    watch.set_defaults(func=cmd_watch)
+
+    return parser
+
+# === MAIN SCRIPT === #
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    args.func(args)
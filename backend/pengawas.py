@@ -0,0 +1,265 @@
+import os
+import re
+import sys
+import json
+import time
+import queue
+import threading
+from dotenv import load_dotenv
+
+from memori import stage, report, low_memory_mode, MEMORY_TELEMETRY
+
+# === Load environment variables === #
+load_dotenv()
+
+# === CONFIGURATION === #
+WATCH_DIR = os.getenv('WATCH_DIR', 'resource')
+POLL_INTERVAL = float(os.getenv('WATCH_POLL_INTERVAL', 5))
+QUEUE_SIZE = int(os.getenv('WATCH_QUEUE_SIZE', 8))
+WORKERS = int(os.getenv('WATCH_WORKERS', 1))
+# Seconds a workbook waits for its PDF before it is loaded without notes
+PDF_GRACE = float(os.getenv('WATCH_PDF_GRACE', 300))
+# Signatures of pairs already loaded, so a restarted daemon does not load them again
+STATE_FILE = os.getenv('WATCH_STATE_FILE', os.path.join(os.getenv('CHECKPOINT_DIR', '.checkpoint'), 'pengawas.json'))
+
+FILE_PATTERN = re.compile(r"^(FinancialStatement-.+)\.(xlsx|pdf)$")
+
+# === FUNCTIONS === #
+# The watcher polls the directory with the standard library only, so the daemon adds no dependency.
+# A file is queued once its size and mtime are unchanged across two polls, so half-copied files are
+# never parsed. A workbook without its PDF is held for PDF_GRACE seconds so the pair is loaded once,
+# with notes. Pairs are recorded in STATE_FILE once loaded and skipped after a restart until they
+# change; a pair that is loaded again replaces its period instead of appending to it.
+# Workers import the loaders once and keep their caches warm between files: parsed
+# sheets (load_excel_sheet), page texts (halaman_pdf), cleaned labels (clean_item), interned item IDs
+# and aliases (kamus_akun). Over MEMORY_BUDGET_MB those caches are dropped after each file.
+def scan(watch_dir):
+    """Group FinancialStatement files by name: {stem: {'xlsx': path, 'pdf': path}}."""
+    pairs = {}
+    for name in os.listdir(watch_dir):
+        match = FILE_PATTERN.match(name)
+        if match:
+            stem, extension = match.groups()
+            pairs.setdefault(stem, {})[extension] = os.path.join(watch_dir, name)
+    return pairs
+
+def pair_signature(pair):
+    """Size and mtime of every file in a pair; changes when either file is added or rewritten."""
+    signature = []
+    for extension in ('xlsx', 'pdf'):
+        path = pair.get(extension)
+        if path is None:
+            signature.append(None)
+        else:
+            stat = os.stat(path)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+def load_processed(state_file=STATE_FILE):
+    """Return {stem: signature} of the pairs loaded by earlier runs."""
+    try:
+        with open(state_file, encoding='utf-8') as file:
+            stored = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    # JSON turns the signature tuples into lists
+    return {stem: tuple(tuple(part) if part else None for part in signature) for stem, signature in stored.items()}
+
+def mark_processed(processed, lock, stem, signature, state_file=STATE_FILE):
+    """Record a loaded pair and rewrite the state file atomically."""
+    with lock:
+        processed[stem] = signature
+        os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+        temp_file = state_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(processed, file)
+        os.replace(temp_file, state_file)
+
+def watch(watch_dir, jobs, stop, processed, interval=POLL_INTERVAL, pdf_grace=PDF_GRACE):
+    """Poll a directory and queue each new or changed pair once it has stopped changing."""
+    last_seen = {}
+    first_seen = {}
+    queued = dict(processed)
+    while not stop.is_set():
+        try:
+            pairs = scan(watch_dir)
+        except OSError as e:
+            print(f"Error scanning '{watch_dir}': {e}")
+            pairs = {}
+
+        for stem, pair in sorted(pairs.items()):
+            try:
+                signature = pair_signature(pair)
+            except OSError:
+                continue  # file vanished between listdir and stat
+            stable = last_seen.get(stem) == signature
+            last_seen[stem] = signature
+            first_seen.setdefault(stem, time.monotonic())
+            if 'pdf' not in pair and time.monotonic() - first_seen[stem] < pdf_grace:
+                continue  # the PDF may still be on its way
+            if stable and queued.get(stem) != signature:
+                # put() blocks while the queue is full, so a burst of files cannot outrun the workers
+                jobs.put((stem, pair, signature))
+                queued[stem] = signature
+                print(f"Queued {stem} ({jobs.qsize()}/{jobs.maxsize} waiting).")
+
+        stop.wait(interval)
+
+def load_keuangan(excel_file, pdf_file, notes_pages, state):
+    """Append neraca, laba rugi and arus kas of one workbook to laporan_keuangan."""
+    import laporan_keuangan
+    from kamus_akun import load_item_aliases
+
+    config = (laporan_keuangan.DB_HOST, laporan_keuangan.DB_USER, laporan_keuangan.DB_NAME)
+    if 'aliases' not in state:
+        state['aliases'] = load_item_aliases(*config)
+
+    df_combined = laporan_keuangan.build_statement_dataframe(
+        excel_file, pdf_file if notes_pages else None, pages=notes_pages, aliases=state['aliases'])
+    laporan_keuangan.save_to_mysql(df_combined, laporan_keuangan.TABLE_NAME, *config, replace=True)
+
+    # Pick up the aliases this file taught the dictionary
+    state['aliases'] = load_item_aliases(*config)
+
+def load_calk(pdf_file, last_page):
+    """Store the CALK sections of one PDF."""
+    import laporan_calk
+    from periode import parse_statement_filename
+
+    tahun, quartal, kode_emiten = parse_statement_filename(pdf_file)
+    if tahun is None:
+        print(f"Skipping CALK: cannot tell the period of '{os.path.basename(pdf_file)}' from its name.")
+        return
+    end_page = min(laporan_calk.CALK_END_PAGE, last_page)
+    if end_page < laporan_calk.CALK_START_PAGE:
+        print(f"Skipping CALK: PDF has only {last_page} pages.")
+        return
+    organized_text = laporan_calk.extract_and_organize_text(pdf_file, laporan_calk.CALK_START_PAGE, end_page)
+    if organized_text:
+        laporan_calk.save_to_database(
+            laporan_calk.DB_HOST,
+            laporan_calk.DB_USER,
+            laporan_calk.DB_PASSWORD,
+            laporan_calk.DB_NAME,
+            laporan_calk.TABLE_NAME,
+            organized_text,
+            kode_emiten,
+            tahun,
+            quartal,
+        )
+
+def process_pair(stem, pair, state):
+    """Run the keuangan and CALK loaders for one xlsx/pdf pair; returns True if none of them failed."""
+    from laporan_keuangan import NOTES_PAGES
+    from halaman_pdf import page_count
+
+    excel_file = pair.get('xlsx')
+    pdf_file = pair.get('pdf')
+
+    # Notes pages past the end of a short PDF would make the loaders exit
+    last_page = page_count(pdf_file) if pdf_file else 0
+    notes_pages = [page for page in NOTES_PAGES if page <= last_page]
+
+    # neraca.py is not run here: it rewrites the whole laporan_neraca table on every save and has no period
+    # key, so it can only ever hold one workbook. The balance sheet is loaded per period by the keuangan step.
+    steps = []
+    if excel_file:
+        steps.append(('keuangan', lambda: load_keuangan(excel_file, pdf_file, notes_pages, state)))
+    if pdf_file:
+        steps.append(('calk', lambda: load_calk(pdf_file, last_page)))
+
+    succeeded = True
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            with stage(f"{stem}: {name}"):
+                step()
+            print(f"[{stem}] {name} finished in {time.perf_counter() - start:.1f}s.")
+        except (Exception, SystemExit) as e:
+            # The loaders call exit(1) on errors; that must not take the daemon down
+            print(f"[{stem}] {name} failed: {e!r}")
+            succeeded = False
+    report()
+
+    # Over the memory budget, warm caches are a luxury: drop them so the next file starts lean
+    if low_memory_mode():
+        release_caches()
+    return succeeded
+
+def release_caches():
+    """Drop the cached sheets, PDF pages and cleaned labels held by the loaders."""
+    import laporan_keuangan
+    from halaman_pdf import clear_cache
+
+    laporan_keuangan._read_excel_sheet.cache_clear()
+    laporan_keuangan.clean_item.cache_clear()
+    clear_cache()
+
+def worker(jobs, state, processed, lock):
+    """Take pairs off the queue until a None sentinel arrives."""
+    while True:
+        job = jobs.get()
+        try:
+            if job is None:
+                return
+            stem, pair, signature = job
+            start = time.perf_counter()
+            try:
+                # A pair with a failed loader is not recorded, so the next start retries it
+                if process_pair(stem, pair, state):
+                    mark_processed(processed, lock, stem, signature)
+            except Exception as e:
+                print(f"[{stem}] Error: {e!r}")
+            print(f"[{stem}] Done in {time.perf_counter() - start:.1f}s.")
+        finally:
+            jobs.task_done()
+
+def migrate_schema():
+    """Apply pending laporan_keuangan migrations; without a reachable database the daemon cannot load anything."""
+    import laporan_keuangan
+    from migrasi import get_engine, migrate
+
+    try:
+        migrate(get_engine(laporan_keuangan.DB_HOST, laporan_keuangan.DB_USER, laporan_keuangan.DB_NAME),
+                laporan_keuangan.TABLE_NAME)
+    except Exception as e:
+        print(f"Error migrating schema: {e}")
+        sys.exit(1)
+
+def run(watch_dir=WATCH_DIR, interval=POLL_INTERVAL, workers=WORKERS, queue_size=QUEUE_SIZE):
+    """Watch a directory and ingest new or changed pairs until interrupted."""
+    if not os.path.isdir(watch_dir):
+        print(f"Watch directory '{watch_dir}' does not exist.")
+        sys.exit(1)
+
+    # Bring the schema up to date once, before any worker saves: concurrent migrate() calls would each see
+    # the same pending versions and the second would fail halfway through
+    migrate_schema()
+
+    jobs = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    state = {}
+    processed = load_processed()
+    lock = threading.Lock()
+
+    threads = [threading.Thread(target=worker, args=(jobs, state, processed, lock), daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    print(f"Watching '{watch_dir}' every {interval}s with {workers} worker(s). Press Ctrl+C to stop.")
+    if MEMORY_TELEMETRY and workers > 1:
+        print("MEMORY_TELEMETRY is on: workers take turns so each stage's memory is measured on its own.")
+    try:
+        watch(watch_dir, jobs, stop, processed, interval)
+    except KeyboardInterrupt:
+        print("\nStopping, waiting for queued files to finish...")
+    finally:
+        stop.set()
+        for _ in threads:
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+
+# === MAIN SCRIPT === #
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,29 @@
+import os
+import re
+
+# === CONFIGURATION === #
+# Period segment of the file name -> quartal stored in the database
+KUARTAL_MAP = {
+    'I': 'I',
+    'II': 'II',
+    'III': 'III',
+    'Tahunan': 'IV',
+}
+
+# quartal -> position within the year, for ordering periods
+KUARTAL_ORDER = {'I': 1, 'II': 2, 'III': 3, 'IV': 4}
+
+FILENAME_PATTERN = re.compile(r"FinancialStatement-(\d{4})-(I|II|III|Tahunan)-(\w+)\.\w+$")
+
+# === FUNCTIONS === #
+def parse_statement_filename(file_path):
+    """Extract year, quarter and emiten code from a FinancialStatement-<tahun>-<periode>-<kode> file name."""
+    match = FILENAME_PATTERN.search(os.path.basename(file_path))
+    if not match:
+        return None, 'Unknown', None
+    tahun, periode, kode_emiten = match.groups()
+    return int(tahun), KUARTAL_MAP[periode], kode_emiten
+
+def period_order(tahun, quartal):
+    """Sort key for a period; unknown quarters sort before quarter I."""
+    return tahun, KUARTAL_ORDER.get(quartal, 0)
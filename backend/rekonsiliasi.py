@@ -0,0 +1,230 @@
+import os
+import glob
+from dotenv import load_dotenv
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from laporan_keuangan import parse_excel_to_dataframe, load_excel_sheet
+from periode import parse_statement_filename, KUARTAL_ORDER
+
+# === Load environment variables === #
+load_dotenv()
+
+# === CONFIGURATION === #
+RESOURCE_DIR = os.getenv('RESOURCE_DIR', 'resource')
+DB_HOST = os.getenv('DB_HOST')
+DB_USER = os.getenv('DB_USER')
+DB_NAME = 'pangkalan_data'
+TABLE_NAME = 'rekonsiliasi_pengecualian'
+
+# Differences up to this many rounding units (see ROUNDING_FACTORS) are treated as rounding, not mismatches
+TOLERANCE = 1
+
+# Rounding declared in sheet 1000000 ("Pembulatan yang digunakan ...") -> rupiah per reported unit
+ROUNDING_LABEL = 'Pembulatan yang digunakan'
+ROUNDING_FACTORS = {
+    'Satuan': 1,
+    'Ribuan': 1_000,
+    'Jutaan': 1_000_000,
+    'Miliar': 1_000_000_000,
+}
+
+REPORT_TYPES = ['neraca', 'laba_rugi', 'arus_kas']
+KEYS = ['kode_emiten', 'tahun', 'quartal']
+
+OPENING_CASH_ITEM = 'Kas dan setara kas arus kas, awal periode'
+CLOSING_CASH_ITEM = 'Kas dan setara kas arus kas, akhir periode'
+
+# (cek, grup_lk, total item, component items) -- total must equal the sum of its components
+BALANCE_IDENTITIES = [
+    ('neraca_seimbang', 'laporan_neraca', 'Jumlah aset', [
+        'Jumlah liabilitas, dana syirkah temporer dan ekuitas',
+    ]),
+    ('neraca_komponen', 'laporan_neraca', 'Jumlah liabilitas, dana syirkah temporer dan ekuitas', [
+        'Jumlah liabilitas',
+        'Jumlah dana syirkah temporer',
+        'Jumlah ekuitas',
+    ]),
+    ('arus_kas_aktivitas', 'laporan_aruskas', 'Jumlah kenaikan (penurunan) bersih kas dan setara kas', [
+        'Jumlah arus kas bersih yang diperoleh dari (digunakan untuk) aktivitas operasi',
+        'Jumlah arus kas bersih yang diperoleh dari (digunakan untuk) aktivitas investasi',
+        'Jumlah arus kas bersih yang diperoleh dari (digunakan untuk) aktivitas pendanaan',
+    ]),
+    ('arus_kas_saldo', 'laporan_aruskas', CLOSING_CASH_ITEM, [
+        OPENING_CASH_ITEM,
+        'Jumlah kenaikan (penurunan) bersih kas dan setara kas',
+        'Efek perubahan nilai kurs pada kas dan setara kas',
+        'Kas dan setara kas dari entitas anak yang didekonsolidasikan',
+        'Kenaikan (penurunan) kas dan setara kas lainnya',
+    ]),
+]
+
+EXCEPTION_COLUMNS = KEYS + ['cek', 'grup_lk', 'item', 'nilai', 'nilai_seharusnya', 'selisih']
+
+# === FUNCTIONS === #
+def declared_rounding(excel_file):
+    """Rupiah per reported unit, as declared in the workbook's general information sheet (1 if not found)."""
+    sheet = load_excel_sheet(excel_file, '1000000')
+    # The row moves between taxonomy versions, so it is found by its label
+    labels = sheet.iloc[:, 0].astype(str)
+    declared = sheet.loc[labels.str.startswith(ROUNDING_LABEL), 1]
+    if declared.empty or pd.isna(declared.iloc[0]):
+        return 1
+    return ROUNDING_FACTORS.get(str(declared.iloc[0]).split()[0], 1)
+
+def load_facts(resource_dir):
+    """Load neraca, laba rugi and arus kas facts for every FinancialStatement workbook in a directory."""
+    frames = []
+    for excel_file in sorted(glob.glob(os.path.join(resource_dir, 'FinancialStatement-*.xlsx'))):
+        tahun, _, _ = parse_statement_filename(excel_file)
+        if tahun is None:
+            print(f"Skipping file with unrecognised name: {excel_file}")
+            continue
+        pembulatan = declared_rounding(excel_file)
+        for report_type in REPORT_TYPES:
+            frames.append(parse_excel_to_dataframe(excel_file, {}, report_type=report_type).assign(pembulatan=pembulatan))
+
+    if not frames:
+        return pd.DataFrame(columns=['kode_emiten', 'nama_emiten', 'tahun', 'quartal', 'grup_lk', 'item', 'nilai', 'catatan',
+                                     'pembulatan'])
+    return pd.concat(frames, ignore_index=True)
+
+def normalize_units(facts):
+    """Convert every value to rupiah and record which unit each workbook's values were actually in.
+
+    Workbooks declare their rounding, but some are filled in full rupiah regardless. A workbook whose
+    non-zero values are mostly exact multiples of its declared unit is taken to be in rupiah already
+    (per-share figures are never rounded, so not all of them are).
+    """
+    pembulatan = facts['pembulatan'].fillna(1)
+    nonzero = facts['nilai'].fillna(0) != 0
+    multiple = (facts['nilai'] % pembulatan == 0).where(nonzero)
+    share = multiple.groupby([facts[key] for key in KEYS]).transform('mean')
+    in_rupiah = (pembulatan > 1) & (share > 0.5)
+
+    satuan = pembulatan.where(~in_rupiah, 1)
+    return facts.assign(pembulatan=pembulatan, satuan=satuan, nilai=facts['nilai'] * satuan)
+
+def check_units(facts):
+    """Flag workbooks whose values are not in the unit they declare."""
+    periods = facts.groupby(KEYS)[['pembulatan', 'satuan']].first().reset_index()
+    mismatched = periods[periods['pembulatan'] != periods['satuan']]
+    return pd.DataFrame({
+        'kode_emiten': mismatched['kode_emiten'],
+        'tahun': mismatched['tahun'],
+        'quartal': mismatched['quartal'],
+        'cek': 'satuan_pembulatan',
+        'grup_lk': None,
+        'item': ROUNDING_LABEL,
+        'nilai': mismatched['satuan'],
+        'nilai_seharusnya': mismatched['pembulatan'],
+        'selisih': mismatched['satuan'] - mismatched['pembulatan'],
+    }, columns=EXCEPTION_COLUMNS)
+
+def period_tolerance(facts, index, tolerance):
+    """Tolerance in rupiah for each period in index: tolerance rounding units of that period's workbook."""
+    units = facts.groupby(KEYS)['pembulatan'].first()
+    return pd.Series(units.reindex(index).fillna(1).to_numpy() * tolerance, index=index)
+
+def pivot_items(facts, grup_lk, items):
+    """Pivot the given items of one report group to one row per emiten/year/quarter."""
+    subset = facts[(facts['grup_lk'] == grup_lk) & facts['item'].isin(items)]
+    if subset.empty:
+        return pd.DataFrame(columns=items, index=pd.MultiIndex.from_tuples([], names=KEYS), dtype=float)
+    wide = subset.pivot_table(index=KEYS, columns='item', values='nilai', aggfunc='first')
+    return wide.reindex(columns=items)
+
+def check_balance_identities(facts, tolerance=TOLERANCE):
+    """Check that every total in BALANCE_IDENTITIES equals the sum of its components, per period."""
+    frames = []
+    for cek, grup_lk, total_item, component_items in BALANCE_IDENTITIES:
+        wide = pivot_items(facts, grup_lk, [total_item] + component_items)
+        wide = wide[wide[total_item].notna()]
+        expected = wide[component_items].fillna(0).sum(axis=1)
+        selisih = wide[total_item] - expected
+        limit = period_tolerance(facts, wide.index, tolerance)
+
+        result = pd.DataFrame({
+            'cek': cek,
+            'grup_lk': grup_lk,
+            'item': total_item,
+            'nilai': wide[total_item],
+            'nilai_seharusnya': expected,
+            'selisih': selisih,
+        })
+        frames.append(result[selisih.abs() > limit].reset_index())
+
+    return pd.concat(frames, ignore_index=True)
+
+def check_opening_cash(facts, tolerance=TOLERANCE):
+    """Check that year-to-date cash flows share one opening balance, carried over from the prior year-end."""
+    cash = pivot_items(facts, 'laporan_aruskas', [OPENING_CASH_ITEM, CLOSING_CASH_ITEM]).reset_index()
+    cash['urutan'] = cash['quartal'].map(KUARTAL_ORDER)
+    cash = cash.dropna(subset=['urutan']).sort_values(['kode_emiten', 'tahun', 'urutan'])
+
+    # Quarterly and annual statements are cumulative, so each period of a year opens at the same balance
+    opening = cash.dropna(subset=[OPENING_CASH_ITEM])
+    expected = opening.groupby(['kode_emiten', 'tahun'])[OPENING_CASH_ITEM].transform('first')
+    same_year = opening.assign(
+        cek='saldo_awal_tahun',
+        nilai=opening[OPENING_CASH_ITEM],
+        nilai_seharusnya=expected,
+    )
+
+    # ...and that balance is the closing balance of the previous year's annual statement
+    prior_close = cash.loc[cash['quartal'] == 'IV', ['kode_emiten', 'tahun', CLOSING_CASH_ITEM]]
+    prior_close = prior_close.assign(tahun=prior_close['tahun'] + 1)
+    carried = opening.merge(prior_close, on=['kode_emiten', 'tahun'], suffixes=('', '_lalu'))
+    carried = carried.dropna(subset=[CLOSING_CASH_ITEM + '_lalu'])
+    carried = carried.assign(
+        cek='saldo_akhir_tahun_lalu',
+        nilai=carried[OPENING_CASH_ITEM],
+        nilai_seharusnya=carried[CLOSING_CASH_ITEM + '_lalu'],
+    )
+
+    result = pd.concat([same_year, carried], ignore_index=True)
+    result['grup_lk'] = 'laporan_aruskas'
+    result['item'] = OPENING_CASH_ITEM
+    result['selisih'] = result['nilai'] - result['nilai_seharusnya']
+    limit = period_tolerance(facts, pd.MultiIndex.from_frame(result[KEYS]), tolerance)
+    return result.loc[result['selisih'].abs().to_numpy() > limit.to_numpy(), EXCEPTION_COLUMNS].reset_index(drop=True)
+
+def reconcile(facts, tolerance=TOLERANCE):
+    """Run all consistency checks over the loaded facts and return the mismatches as an exceptions table."""
+    facts = normalize_units(facts.assign(nilai=pd.to_numeric(facts['nilai'], errors='coerce')))
+    exceptions = pd.concat([
+        check_units(facts),
+        check_balance_identities(facts, tolerance),
+        check_opening_cash(facts, tolerance),
+    ], ignore_index=True)
+    return exceptions.reindex(columns=EXCEPTION_COLUMNS).sort_values(KEYS + ['cek'], ignore_index=True)
+
+def save_to_mysql(df, table_name, host, user, db_name):
+    """Save the exceptions table to a MySQL database, replacing the previous run."""
+    mysql_uri = f'mysql+mysqlconnector://{user}@{host}/'
+    engine = create_engine(mysql_uri)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(f"CREATE DATABASE IF NOT EXISTS {db_name}"))
+
+        mysql_uri += db_name
+        engine = create_engine(mysql_uri)
+        df.to_sql(table_name, engine, if_exists='replace', index=False)
+        print(f"Exceptions successfully written to table '{table_name}' in database '{db_name}'.")
+    except Exception as e:
+        print(f"Error saving data to MySQL: {e}")
+        exit(1)
+
+# === MAIN SCRIPT === #
+if __name__ == "__main__":
+    facts = load_facts(RESOURCE_DIR)
+    print(f"Loaded {len(facts)} facts from '{RESOURCE_DIR}'.")
+
+    exceptions = reconcile(facts)
+    if exceptions.empty:
+        print("All statements reconcile.")
+    else:
+        print(f"\nFound {len(exceptions)} reconciliation exceptions:")
+        print(exceptions.to_string(index=False))
+
+    save_to_mysql(exceptions, TABLE_NAME, DB_HOST, DB_USER, DB_NAME)
@@ -1,12 +1,15 @@
 import os
 import re
 from dotenv import load_dotenv
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, BooleanVar
 from ttkbootstrap import Style
 from ttkbootstrap.constants import PRIMARY
-from ttkbootstrap.widgets import Frame, Label, Button, Entry, Progressbar
+from ttkbootstrap.widgets import Frame, Label, Button, Entry, Progressbar, Checkbutton
 from PyPDF2 import PdfReader
-import mysql.connector
+
+import laporan_calk
+from jurnal import open_journal, record_page, close_journal
+from periode import parse_statement_filename
 
 # Load environment variables
 load_dotenv()
@@ -26,14 +29,20 @@ def clean_title(title):
         return f"{number}. {text}"
     return None
 
-def extract_and_organize_text(file_path, start_page, end_page, progress_callback):
+def extract_and_organize_text(file_path, start_page, end_page, progress_callback, journal=None):
     try:
         reader = PdfReader(file_path)
         total_pages = len(reader.pages)
         relevant_text = ""
 
         for idx, page in enumerate(reader.pages):
-            page_text = page.extract_text()
+            # Pages checkpointed by an earlier run are not extracted again
+            if journal is not None and idx + 1 in journal['pages']:
+                page_text = journal['pages'][idx + 1]
+            else:
+                page_text = page.extract_text()
+                if journal is not None:
+                    record_page(journal, idx + 1, page_text)
             if "CATATAN ATAS LAPORAN KEUANGAN" in page_text:
                 relevant_text += page_text
             progress_callback((idx + 1) / total_pages * 100)
@@ -80,38 +89,16 @@ def extract_and_organize_text(file_path, start_page, end_page, progress_callback
         return None
 
 # === SAVE TO DATABASE === #
-def save_to_database(host, user, password, db_name, table_name, data):
-    try:
-        connection = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=db_name
-        )
-        cursor = connection.cursor()
-
-        create_table_query = f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            title VARCHAR(255) NOT NULL,
-            subtitle LONGTEXT,
-            content LONGTEXT NOT NULL
-        );
-        """
-        cursor.execute(create_table_query)
-
-        insert_query = f"INSERT INTO {table_name} (title, subtitle, content) VALUES (%s, %s, %s)"
-        for entry in data:
-            cursor.execute(insert_query, (entry['title'], entry['subtitle'], entry['content']))
-        connection.commit()
+def save_to_database(host, user, password, db_name, table_name, data, file_path, journal=None):
+    """Save the sections through laporan_calk, under the period named by the PDF file, and report the result."""
+    tahun, quartal, kode_emiten = parse_statement_filename(file_path)
 
+    # Same {table}_isi / {table}_periode layout, dedup and change report as `pangkalan calk`
+    if laporan_calk.save_to_database(host, user, password, db_name, table_name, data, kode_emiten, tahun, quartal, journal):
         messagebox.showinfo("Success", "Data has been successfully saved to the database. Processing completed!")
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Database error: {err}")
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        return True
+    messagebox.showerror("Database Error", "Saving to the database failed; see the console for details.")
+    return False
 
 # === MAIN SCRIPT WITH UI === #
 def main():
@@ -127,6 +114,11 @@ def main():
             if not file_path:
                 messagebox.showwarning("Input Error", "Please select a PDF file.")
                 return
+            # Sections are stored per period, so check the name before spending minutes on the scan
+            if parse_statement_filename(file_path)[0] is None:
+                messagebox.showwarning("Input Error", "The PDF file name does not identify a period; rename it to "
+                                                      "FinancialStatement-<tahun>-<periode>-<kode>.pdf.")
+                return
 
             progress_bar['value'] = 0
             progress_message['text'] = "Processing started..."
@@ -136,10 +128,15 @@ def main():
                 progress_message['text'] = f"Progress: {int(value)}%"
                 root.update_idletasks()
 
-            organized_text = extract_and_organize_text(file_path, None, None, update_progress)
+            # Checkpoint pages and committed rows so a failed run can resume where it stopped
+            journal = open_journal(file_path, None, None) if resume_var.get() else None
+
+            organized_text = extract_and_organize_text(file_path, None, None, update_progress, journal)
             if organized_text:
-                save_to_database(DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, TABLE_NAME, organized_text)
-                progress_message['text'] = "Processing finished successfully!"
+                if save_to_database(DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, TABLE_NAME, organized_text, file_path, journal):
+                    if journal is not None:
+                        close_journal(journal)
+                    progress_message['text'] = "Processing finished successfully!"
         except Exception as e:
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
 
@@ -157,7 +154,9 @@ def main():
     file_entry.grid(row=0, column=1, padx=5, pady=10)
     Button(frame, text="Browse", bootstyle=PRIMARY, command=select_file).grid(row=0, column=2, padx=5, pady=10)
 
-    Button(frame, text="Process", bootstyle=PRIMARY, command=process_file).grid(row=1, columnspan=3, pady=20)
+    resume_var = BooleanVar(value=True)
+    Checkbutton(frame, text="Resume from checkpoint", variable=resume_var, bootstyle=PRIMARY).grid(row=1, column=0, sticky="w")
+    Button(frame, text="Process", bootstyle=PRIMARY, command=process_file).grid(row=1, column=1, columnspan=2, pady=20)
 
     progress_bar = Progressbar(frame, orient="horizontal", length=400, mode="determinate", bootstyle=PRIMARY)
     progress_bar.grid(row=2, columnspan=3, pady=10)